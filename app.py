@@ -1,7 +1,7 @@
 """Flask web application for book download service with URL rewrite support."""
 
 import logging
-import io, re, os
+import re, os
 import sqlite3
 from functools import wraps
 from flask import Flask, request, jsonify, render_template, send_file, send_from_directory
@@ -431,18 +431,18 @@ def api_local_download() -> Union[Response, Tuple[Response, int]]:
         return jsonify({"error": "No book ID provided"}), 400
 
     try:
-        file_data, book_info = backend.get_book_data(book_id)
-        if file_data is None:
+        file_handle, book_info = backend.get_book_data_stream(book_id)
+        if file_handle is None:
             # Book data not found or not available
             return jsonify({"error": "File not found"}), 404
         # Santize the file name
         file_name = book_info.title
         file_name = re.sub(r'[\\/:*?"<>|]', '_', file_name.strip())[:245]
         file_extension = book_info.format
-        # Prepare the file for sending to the client
-        data = io.BytesIO(file_data)
+        # Stream the open handle so WSGI can use sendfile instead of
+        # buffering the whole book in memory.
         return send_file(
-            data,
+            file_handle,
             download_name=f"{file_name}.{file_extension}",
             as_attachment=True
         )
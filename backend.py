@@ -1,26 +1,25 @@
 """Backend logic for the book download application."""
 
 import threading, time
+import dataclasses
+import functools
 import shutil
+from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from typing import BinaryIO, Dict, List, Optional, Any, Tuple
 import subprocess
 import os
 import hashlib
 import json
+import mmap
 from datetime import datetime
-from concurrent.futures import (
-    ThreadPoolExecutor,
-    Future,
-    wait,
-    FIRST_COMPLETED,
-    ALL_COMPLETED,
-)
+import queue as simple_queue
+from concurrent.futures import ThreadPoolExecutor, Future
 from threading import Event
 
 from logger import setup_logger
-from config import CUSTOM_SCRIPT
-from env import INGEST_DIR, TMP_DIR, MAIN_LOOP_SLEEP_TIME, USE_BOOK_TITLE, MAX_CONCURRENT_DOWNLOADS, DOWNLOAD_PROGRESS_UPDATE_INTERVAL
+from config import CUSTOM_SCRIPT, CROSS_FILE_SYSTEM
+from env import INGEST_DIR, TMP_DIR, MAIN_LOOP_SLEEP_TIME, USE_BOOK_TITLE, MAX_CONCURRENT_DOWNLOADS, DOWNLOAD_PROGRESS_UPDATE_INTERVAL, FILENAME_HASH_ALGO
 from models import book_queue, BookInfo, QueueStatus, SearchFilters, DuplicateEntry
 import book_manager
 
@@ -29,50 +28,227 @@ logger = setup_logger(__name__)
 _DUPLICATE_STATE_FILE = Path(__file__).resolve().parent / "data" / "duplicate-review.json"
 _DUPLICATE_STATE_LOCK = threading.Lock()
 
+try:
+    # Prefer cryptography's OpenSSL EVP digests when available: OpenSSL 3.x
+    # auto-dispatches to SHA-NI instructions on supported CPUs, which is
+    # noticeably faster for the bulk hashing done by list_duplicate_groups.
+    from cryptography.hazmat.primitives import hashes as _crypto_hashes
+
+    class _EVPSha256:
+        """Minimal hashlib-style adapter over cryptography's SHA-256."""
+
+        __slots__ = ("_digest",)
+
+        def __init__(self) -> None:
+            self._digest = _crypto_hashes.Hash(_crypto_hashes.SHA256())
+
+        def update(self, data: bytes) -> None:
+            self._digest.update(data)
+
+        def hexdigest(self) -> str:
+            return self._digest.finalize().hex()
+
+    _HASHER_FACTORY = _EVPSha256
+    logger.debug("Using cryptography (OpenSSL EVP) backend for file hashing")
+except ImportError:
+    def _HASHER_FACTORY():  # type: ignore[misc]
+        return hashlib.new("sha256")
+    logger.debug("Using hashlib backend for file hashing")
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    # Optional: serializes several times faster than stdlib json and sorts
+    # keys natively, shortening hold time under _DUPLICATE_STATE_LOCK.
+    import orjson
+except ImportError:
+    orjson = None
+
+if FILENAME_HASH_ALGO == "xxh3" and xxhash is None:
+    logger.warning("FILENAME_HASH_ALGO=xxh3 requested but xxhash is not installed; using md5")
+
+
+def _short_id(value: str) -> str:
+    """Return a short unique filename suffix for ``value`` (not cryptographic)."""
+    if FILENAME_HASH_ALGO == "xxh3" and xxhash is not None:
+        return xxhash.xxh3_64_hexdigest(value.encode("utf-8"))[:8]
+    return hashlib.md5(value.encode("utf-8")).hexdigest()[:8]
+
+
+class _SanitizeTable(dict):
+    """Memoizing ``str.translate`` table keeping alphanumerics plus ' ', '.', '_'."""
+
+    def __missing__(self, code: int) -> Optional[str]:
+        char = chr(code)
+        result = char if (char.isalnum() or char in " ._") else None
+        self[code] = result
+        return result
+
+
+_SANITIZE_TABLE = _SanitizeTable()
+
+
 def _sanitize_filename(filename: str) -> str:
     """Sanitize a filename by replacing spaces with underscores and removing invalid characters."""
-    keepcharacters = (' ','.','_')
-    return "".join(c for c in filename if c.isalnum() or c in keepcharacters).rstrip()
+    return filename.translate(_SANITIZE_TABLE).rstrip()
+
+
+# Files above this size are hashed with chunked reads instead of mmap to cap RSS.
+_MMAP_HASH_LIMIT = 256 * 1024 * 1024
 
 
-def _hash_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+def _hash_file(path: Path, chunk_size: int = 4 * 1024 * 1024) -> str:
     """Return a SHA-256 hash of the file at ``path``."""
-    digest = hashlib.sha256()
+    digest = _HASHER_FACTORY()
     with path.open("rb") as handle:
-        for chunk in iter(lambda: handle.read(chunk_size), b""):
-            digest.update(chunk)
+        fd = handle.fileno()
+        if hasattr(os, "posix_fadvise"):
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:  # pragma: no cover - advisory only
+                pass
+
+        size = os.fstat(fd).st_size
+        if 0 < size <= _MMAP_HASH_LIMIT:
+            try:
+                with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+                    # Single zero-copy update over the mapped pages instead of
+                    # one bytes allocation per chunk.
+                    digest.update(memoryview(mapped))
+                return digest.hexdigest()
+            except (OSError, ValueError):  # pragma: no cover - mmap unavailable
+                pass
+
+        # Reuse one buffer via readinto instead of allocating a fresh bytes
+        # object per chunk; 4 MiB reads align well with kernel readahead.
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        while (read := handle.readinto(buffer)):
+            digest.update(view[:read])
     return digest.hexdigest()
 
 
-def _load_duplicate_state_unlocked() -> Dict[str, Dict[str, Any]]:
+_HASH_CACHE_FILE = Path(__file__).resolve().parent / "data" / "hash-cache.json"
+_HASH_CACHE_LOCK = threading.Lock()
+_hash_cache: Optional[Dict[str, Dict[str, Any]]] = None
+_hash_cache_dirty = False
+
+
+def _load_hash_cache_unlocked() -> Dict[str, Dict[str, Any]]:
     try:
-        with _DUPLICATE_STATE_FILE.open("r", encoding="utf-8") as handle:
+        with _HASH_CACHE_FILE.open("r", encoding="utf-8") as handle:
             data = json.load(handle)
             if isinstance(data, dict):
                 return data
     except FileNotFoundError:
         return {}
+    except Exception as exc:  # pragma: no cover - defensive logging
+        logger.error_trace(f"Failed to load hash cache: {exc}")
+    return {}
+
+
+def _cached_hash_file(path: Path, relative_path: str, stat: os.stat_result) -> str:
+    """Return the SHA-256 of ``path``, reusing the persisted cache when the
+    file's size and mtime are unchanged since the last scan."""
+    global _hash_cache, _hash_cache_dirty
+
+    with _HASH_CACHE_LOCK:
+        if _hash_cache is None:
+            _hash_cache = _load_hash_cache_unlocked()
+        cached = _hash_cache.get(relative_path)
+        if (
+            cached
+            and cached.get("size") == stat.st_size
+            and cached.get("mtime_ns") == stat.st_mtime_ns
+        ):
+            return cached["sha256"]
+
+    file_hash = _hash_file(path)
+
+    with _HASH_CACHE_LOCK:
+        _hash_cache[relative_path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_hash,
+        }
+        _hash_cache_dirty = True
+    return file_hash
+
+
+def _flush_hash_cache(valid_keys: Optional[set] = None) -> None:
+    """Persist the hash cache, dropping entries for files no longer present."""
+    global _hash_cache_dirty
+
+    with _HASH_CACHE_LOCK:
+        if _hash_cache is None:
+            return
+        if valid_keys is not None:
+            for key in [k for k in _hash_cache if k not in valid_keys]:
+                del _hash_cache[key]
+                _hash_cache_dirty = True
+        if not _hash_cache_dirty:
+            return
+        try:
+            _HASH_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with _HASH_CACHE_FILE.open("w", encoding="utf-8") as handle:
+                json.dump(_hash_cache, handle)
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.error_trace(f"Failed to save hash cache: {exc}")
+        else:
+            _hash_cache_dirty = False
+
+
+def _load_duplicate_state_unlocked() -> Dict[str, Dict[str, Any]]:
+    try:
+        with _DUPLICATE_STATE_FILE.open("rb") as handle:
+            raw = handle.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        if isinstance(data, dict):
+            return data
+    except FileNotFoundError:
+        return {}
     except Exception as exc:  # pragma: no cover - defensive logging
         logger.error_trace(f"Failed to load duplicate state: {exc}")
     return {}
 
 
+# In-memory copy of the review state; the file stays the source of truth
+# across restarts but per-call reads and per-mutation reloads are avoided.
+_duplicate_state_cache: Optional[Dict[str, Dict[str, Any]]] = None
+
+
+def _get_duplicate_state_unlocked() -> Dict[str, Dict[str, Any]]:
+    global _duplicate_state_cache
+    if _duplicate_state_cache is None:
+        _duplicate_state_cache = _load_duplicate_state_unlocked()
+    return _duplicate_state_cache
+
+
 def _load_duplicate_state() -> Dict[str, Dict[str, Any]]:
     with _DUPLICATE_STATE_LOCK:
-        return _load_duplicate_state_unlocked()
+        return dict(_get_duplicate_state_unlocked())
 
 
 def _save_duplicate_state_unlocked(state: Dict[str, Dict[str, Any]]) -> None:
     try:
         _DUPLICATE_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with _DUPLICATE_STATE_FILE.open("w", encoding="utf-8") as handle:
-            json.dump(state, handle, indent=2, sort_keys=True)
+        if orjson is not None:
+            payload = orjson.dumps(state, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+        else:
+            payload = json.dumps(state, indent=2, sort_keys=True).encode("utf-8")
+        with _DUPLICATE_STATE_FILE.open("wb") as handle:
+            handle.write(payload)
     except Exception as exc:  # pragma: no cover - defensive logging
         logger.error_trace(f"Failed to save duplicate state: {exc}")
 
 
 def _save_duplicate_state(state: Dict[str, Dict[str, Any]]) -> None:
+    global _duplicate_state_cache
     with _DUPLICATE_STATE_LOCK:
+        _duplicate_state_cache = state
         _save_duplicate_state_unlocked(state)
 
 
@@ -82,7 +258,7 @@ def set_duplicate_reviewed(group_id: str, reviewed: bool) -> None:
         raise ValueError("group_id is required")
 
     with _DUPLICATE_STATE_LOCK:
-        state = _load_duplicate_state_unlocked()
+        state = _get_duplicate_state_unlocked()
         if reviewed:
             state[group_id] = {
                 "reviewed": True,
@@ -93,12 +269,18 @@ def set_duplicate_reviewed(group_id: str, reviewed: bool) -> None:
         _save_duplicate_state_unlocked(state)
 
 
+@functools.lru_cache(maxsize=1)
+def _ingest_root() -> Path:
+    """Resolved ``INGEST_DIR``, cached to avoid repeated realpath syscalls."""
+    return INGEST_DIR.resolve()
+
+
 def resolve_ingest_file(relative_path: str) -> Path:
     """Return a safe absolute path within ``INGEST_DIR`` for the given relative path."""
     if not relative_path:
         raise ValueError("relative_path is required")
 
-    root = INGEST_DIR.resolve()
+    root = _ingest_root()
     candidate = (root / relative_path).resolve()
     if not candidate.exists() or not candidate.is_file():
         raise FileNotFoundError(relative_path)
@@ -109,56 +291,131 @@ def resolve_ingest_file(relative_path: str) -> Path:
     return candidate
 
 
+def _iter_files(root: Path):
+    """Yield ``os.DirEntry`` objects for every file under ``root``.
+
+    Uses an iterative ``os.scandir`` walk so type and stat information come
+    from the directory entries themselves instead of per-path stat calls.
+    Symlinked directories are not followed.
+    """
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as iterator:
+                for entry in iterator:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            yield entry
+                    except OSError:  # pragma: no cover - entry vanished mid-scan
+                        continue
+        except OSError:  # pragma: no cover - directory vanished mid-scan
+            continue
+
+
 def list_duplicate_groups() -> Dict[str, Any]:
     """Return potential duplicate groups within ``INGEST_DIR``."""
     if not INGEST_DIR.exists():
         return {"groups": []}
 
     state = _load_duplicate_state()
-    root = INGEST_DIR.resolve()
-    entries: List[Dict[str, Any]] = []
-
-    for path in sorted(root.rglob("*")):
-        if not path.is_file():
+    root = _ingest_root()
+
+    # Keep everything as strings until a Path is actually needed: DirEntry
+    # already carries the absolute path and cached stat, and slicing off the
+    # root prefix is cheaper than Path.relative_to per file.
+    root_str = str(root)
+    prefix_len = len(root_str) + 1
+    records: List[Tuple[str, str, os.stat_result]] = []
+    for entry in _iter_files(root):
+        if not entry.path.startswith(root_str):  # pragma: no cover - defensive
             continue
-
+        relative_path = entry.path[prefix_len:].replace(os.sep, "/")
         try:
-            relative_path = path.relative_to(root).as_posix()
-        except ValueError:
+            stat = entry.stat()
+        except OSError:  # pragma: no cover - file vanished mid-scan
             continue
+        records.append((entry.path, relative_path, stat))
+
+    # os.scandir yields entries in filesystem order; sort by relative path so
+    # each group's file listing stays deterministic like the old sorted(rglob)
+    # scan the duplicate-review UI was built against.
+    records.sort(key=lambda record: record[1])
+
+    # Only files sharing (size, extension) with another file can be content
+    # duplicates, so singletons skip hashing entirely and get a pseudo-hash
+    # that can never collide with anything.
+    size_key_counts: Dict[Tuple[int, str], int] = {}
+    for path_str, _, stat in records:
+        key = (stat.st_size, os.path.splitext(path_str)[1].lower())
+        size_key_counts[key] = size_key_counts.get(key, 0) + 1
+
+    def _collect_entry(record: Tuple[str, str, os.stat_result]) -> Optional[Dict[str, Any]]:
+        path_str, relative_path, stat = record
+
+        name = relative_path.rsplit("/", 1)[-1]
+        stem, extension = os.path.splitext(name)
+        sanitized_stem = _sanitize_filename(stem).lower() or stem.lower()
+        if size_key_counts[(stat.st_size, extension.lower())] > 1:
+            try:
+                file_hash = _cached_hash_file(Path(path_str), relative_path, stat)
+            except Exception as exc:  # pragma: no cover - defensive logging
+                logger.error_trace(f"Unable to hash {path_str}: {exc}")
+                return None
+        else:
+            file_hash = f"unique:{relative_path}"
 
-        sanitized_stem = _sanitize_filename(path.stem).lower() or path.stem.lower()
-        try:
-            file_hash = _hash_file(path)
-        except Exception as exc:  # pragma: no cover - defensive logging
-            logger.error_trace(f"Unable to hash {path}: {exc}")
-            continue
+        return {
+            "name": name,
+            "relative_path": relative_path,
+            "size": stat.st_size,
+            "modified": stat.st_mtime,
+            "stem": sanitized_stem,
+            "hash": file_hash,
+            "extension": extension.lstrip("."),
+        }
 
-        stat = path.stat()
-        entries.append(
-            {
-                "name": path.name,
-                "relative_path": relative_path,
-                "size": stat.st_size,
-                "modified": datetime.utcfromtimestamp(stat.st_mtime).isoformat() + "Z",
-                "stem": sanitized_stem,
-                "hash": file_hash,
-                "extension": path.suffix.lstrip("."),
-            }
-        )
+    entries: List[Dict[str, Any]] = []
+    if records:
+        # Hashing releases the GIL and file reads block on disk, so a thread
+        # pool scales well here until disk bandwidth saturates. Submit the
+        # largest files first so one big file does not end up as a serial
+        # tail after all the small ones have finished.
+        max_workers = min(32, (os.cpu_count() or 1) * 2, len(records))
+        order = sorted(range(len(records)), key=lambda i: records[i][2].st_size, reverse=True)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(records)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="DupHash") as pool:
+            futures = {index: pool.submit(_collect_entry, records[index]) for index in order}
+            for index, future in futures.items():
+                results[index] = future.result()
+        entries.extend(entry for entry in results if entry is not None)
+        _flush_hash_cache({relative_path for _, relative_path, _ in records})
 
     groups: List[Dict[str, Any]] = []
 
-    stem_map: Dict[str, List[Dict[str, Any]]] = {}
-    hash_map: Dict[str, List[Dict[str, Any]]] = {}
+    stem_map: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    hash_map: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
 
     for entry in entries:
-        stem_map.setdefault(entry["stem"], []).append(entry)
-        hash_map.setdefault(entry["hash"], []).append(entry)
+        stem_map[entry["stem"]].append(entry)
+        file_hash = entry["hash"]
+        # Pseudo-hashes from the singleton fast path can never group.
+        if not file_hash.startswith("unique:"):
+            hash_map[file_hash].append(entry)
 
     def build_group(group_type: str, key: str, files: List[Dict[str, Any]]) -> Dict[str, Any]:
         group_id = f"{group_type}:{key}"
         review_state = state.get(group_id, {})
+        # Timestamps are kept as raw floats during the scan and only
+        # formatted for files that actually end up in a group. Entries are
+        # shared between stem and hash groups, so this is idempotent.
+        for file_entry in files:
+            modified = file_entry["modified"]
+            if isinstance(modified, float):
+                file_entry["modified"] = time.strftime(
+                    "%Y-%m-%dT%H:%M:%SZ", time.gmtime(modified)
+                )
         return {
             "id": group_id,
             "type": group_type,
@@ -218,7 +475,7 @@ def _build_ingest_paths(book_info: BookInfo) -> Tuple[Path, Path, str]:
         sanitized_title = _sanitize_filename(book_info.title)
         if not sanitized_title:
             sanitized_title = "book"
-        unique_suffix = hashlib.md5(book_info.id.encode("utf-8")).hexdigest()[:8]
+        unique_suffix = _short_id(book_info.id)
         filename_stem = f"{sanitized_title}-{unique_suffix}"
     else:
         filename_stem = book_info.id
@@ -230,6 +487,46 @@ def _build_ingest_paths(book_info: BookInfo) -> Tuple[Path, Path, str]:
     return final_path, intermediate_path, filename_stem
 
 
+# Short-lived snapshot of the ingest directory listing so bulk queueing does
+# not pay two stat syscalls per book in detect_duplicate.
+_INGEST_NAMES_TTL = 1.0
+_INGEST_NAMES_LOCK = threading.Lock()
+_ingest_names: Optional[set] = None
+_ingest_names_dir: Optional[str] = None
+_ingest_names_expiry = 0.0
+
+
+def _ingest_name_set() -> set:
+    """Return the set of entry names in ``INGEST_DIR``, cached briefly."""
+    global _ingest_names, _ingest_names_dir, _ingest_names_expiry
+
+    now = time.monotonic()
+    ingest_dir = str(INGEST_DIR)
+    with _INGEST_NAMES_LOCK:
+        if (
+            _ingest_names is not None
+            and _ingest_names_dir == ingest_dir
+            and now < _ingest_names_expiry
+        ):
+            return _ingest_names
+        try:
+            with os.scandir(ingest_dir) as iterator:
+                names = {entry.name for entry in iterator}
+        except OSError:
+            names = set()
+        _ingest_names = names
+        _ingest_names_dir = ingest_dir
+        _ingest_names_expiry = now + _INGEST_NAMES_TTL
+        return names
+
+
+def _invalidate_ingest_names() -> None:
+    """Drop the cached ingest listing after this process changes the directory."""
+    global _ingest_names
+    with _INGEST_NAMES_LOCK:
+        _ingest_names = None
+
+
 def detect_duplicate(book_info: BookInfo) -> Optional[DuplicateEntry]:
     """Return duplicate metadata if the ingest directory already contains the book."""
     final_path, intermediate_path, _ = _build_ingest_paths(book_info)
@@ -237,16 +534,17 @@ def detect_duplicate(book_info: BookInfo) -> Optional[DuplicateEntry]:
     status = book_queue.get_status_for(book_info.id)
     existing_path: Optional[str] = None
     reason: Optional[str] = None
+    ingest_names = _ingest_name_set()
 
     if status and status not in [QueueStatus.ERROR, QueueStatus.DONE, QueueStatus.CANCELLED]:
         reason = "queued"
         existing_book = book_queue.get_book(book_info.id)
         if existing_book and existing_book.download_path:
             existing_path = existing_book.download_path
-    elif final_path.exists():
+    elif final_path.name in ingest_names:
         reason = "on_disk"
         existing_path = str(final_path)
-    elif intermediate_path.exists():
+    elif intermediate_path.name in ingest_names:
         reason = "downloading"
         existing_path = str(intermediate_path)
 
@@ -347,10 +645,24 @@ def queue_status() -> Dict[str, Dict[str, Any]]:
     status = book_queue.get_status()
     serialized_status: Dict[str, Dict[str, Dict[str, Any]]] = {}
 
+    # One readdir of the ingest directory replaces a stat syscall per tracked
+    # book; paths outside INGEST_DIR still fall back to os.path.exists.
+    ingest_dir = str(INGEST_DIR)
+    try:
+        with os.scandir(ingest_dir) as iterator:
+            ingest_files = {entry.path for entry in iterator if entry.is_file()}
+    except OSError:
+        ingest_files = None
+
+    def _download_path_exists(path: str) -> bool:
+        if ingest_files is not None and os.path.dirname(path) == ingest_dir:
+            return path in ingest_files
+        return os.path.exists(path)
+
     for status_type, books in status.items():
         serialized_books: Dict[str, Dict[str, Any]] = {}
         for book_id, book_info in books.items():
-            if book_info.download_path and not os.path.exists(book_info.download_path):
+            if book_info.download_path and not _download_path_exists(book_info.download_path):
                 book_info.download_path = None
 
             serialized_books[book_id] = _book_info_to_dict(book_info)
@@ -381,11 +693,41 @@ def get_book_data(book_id: str) -> Tuple[Optional[bytes], BookInfo]:
             return None, book_info
         return None, BookInfo(id=book_id, title="Unknown")
 
+def get_book_data_stream(book_id: str) -> Tuple[Optional[BinaryIO], BookInfo]:
+    """Open the downloaded file for a book for streaming to the client.
+
+    Returning the open handle lets Flask's ``send_file`` serve it through
+    ``wsgi.file_wrapper`` (sendfile) instead of buffering the whole file in a
+    Python bytes object first.
+
+    Args:
+        book_id: Book identifier
+
+    Returns:
+        Tuple[Optional[BinaryIO], BookInfo]: Open binary handle if available
+        (the caller is responsible for closing it), and the book info.
+    """
+    book_info: Optional[BookInfo] = None
+    try:
+        book_info = book_queue._book_data[book_id]
+        path = book_info.download_path
+        return open(path, "rb"), book_info
+    except Exception as e:
+        logger.error_trace(f"Error opening book data: {e}")
+        if book_info is not None:
+            book_info.download_path = None
+            return None, book_info
+        return None, BookInfo(id=book_id, title="Unknown")
+
+_BOOK_INFO_FIELDS = tuple(field.name for field in dataclasses.fields(BookInfo))
+
+
 def _book_info_to_dict(book: BookInfo) -> Dict[str, Any]:
     """Convert BookInfo object to dictionary representation."""
     return {
-        key: value for key, value in book.__dict__.items()
-        if value is not None
+        key: value
+        for key in _BOOK_INFO_FIELDS
+        if (value := getattr(book, key)) is not None
     }
 
 def _download_book_with_cancellation(book_id: str, cancel_flag: Event) -> Optional[str]:
@@ -411,7 +753,7 @@ def _download_book_with_cancellation(book_id: str, cancel_flag: Event) -> Option
             sanitized_title = _sanitize_filename(book_info.title)
             if not sanitized_title:
                 sanitized_title = "book"
-            unique_suffix = hashlib.md5(book_id.encode("utf-8")).hexdigest()[:8]
+            unique_suffix = _short_id(book_id)
             filename_stem = f"{sanitized_title}-{unique_suffix}"
         else:
             filename_stem = book_id
@@ -470,21 +812,7 @@ def _download_book_with_cancellation(book_id: str, cancel_flag: Event) -> Option
                         "Error removing stale intermediate file before copy: %s",
                         cleanup_error,
                     )
-                try:
-                    shutil.copy2(book_path, intermediate_path)
-                except Exception as copy_error:
-                    logger.debug(
-                        "Error copying book: %s, will try copying without permissions instead",
-                        copy_error,
-                    )
-                    try:
-                        intermediate_path.unlink(missing_ok=True)
-                    except Exception as cleanup_error:
-                        logger.debug(
-                            "Error removing stale intermediate file before fallback copy: %s",
-                            cleanup_error,
-                        )
-                    shutil.copyfile(book_path, intermediate_path)
+                _copy_to_intermediate(book_path, intermediate_path)
                 if book_path.exists():
                     book_path.unlink()
 
@@ -496,6 +824,7 @@ def _download_book_with_cancellation(book_id: str, cancel_flag: Event) -> Option
                 return None
                 
             os.replace(intermediate_path, final_path)
+            _invalidate_ingest_names()
             logger.info(f"Download completed successfully: {book_info.title}")
             
         return str(final_path)
@@ -506,6 +835,59 @@ def _download_book_with_cancellation(book_id: str, cancel_flag: Event) -> Option
             logger.error_trace(f"Error downloading book: {e}")
         return None
 
+def _copy_to_intermediate(source: Path, target: Path) -> None:
+    """Copy ``source`` to ``target`` using the cheapest mechanism available.
+
+    On a shared filesystem a hardlink is O(1); across filesystems
+    ``os.copy_file_range`` keeps the copy inside the kernel. Falls back to the
+    shutil copy chain when neither applies.
+    """
+    if not CROSS_FILE_SYSTEM:
+        try:
+            os.link(source, target)
+            return
+        except OSError as link_error:
+            logger.debug(f"Hardlink to intermediate failed: {link_error}, will copy instead")
+
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(source, "rb") as src, open(target, "wb") as dst:
+                remaining = os.fstat(src.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        raise OSError("copy_file_range stopped before EOF")
+                    remaining -= copied
+            return
+        except OSError as range_error:
+            logger.debug(
+                f"copy_file_range failed: {range_error}, will use shutil copy instead"
+            )
+            try:
+                target.unlink(missing_ok=True)
+            except Exception as cleanup_error:
+                logger.debug(
+                    "Error removing partial intermediate file before copy: %s",
+                    cleanup_error,
+                )
+
+    try:
+        shutil.copy2(source, target)
+    except Exception as copy_error:
+        logger.debug(
+            "Error copying book: %s, will try copying without permissions instead",
+            copy_error,
+        )
+        try:
+            target.unlink(missing_ok=True)
+        except Exception as cleanup_error:
+            logger.debug(
+                "Error removing stale intermediate file before fallback copy: %s",
+                cleanup_error,
+            )
+        shutil.copyfile(source, target)
+
+
 def update_download_progress(book_id: str, progress: float) -> None:
     """Update download progress."""
     book_queue.update_progress(book_id, progress)
@@ -596,34 +978,46 @@ def concurrent_download_loop(stop_event: Optional[Event] = None) -> None:
         max_workers=MAX_CONCURRENT_DOWNLOADS, thread_name_prefix="BookDownload"
     ) as executor:
         active_futures: Dict[Future, str] = {}
+        # Finished futures hand themselves over through this queue via
+        # add_done_callback, so the coordinator blocks on a single get()
+        # instead of re-snapshotting every future with wait().
+        completed_q: "simple_queue.SimpleQueue[Future]" = simple_queue.SimpleQueue()
+
+        def _drain_completed(block: bool, timeout: Optional[float] = None) -> None:
+            """Consume finished futures, at most blocking for the first one."""
+            try:
+                future = completed_q.get(block=block, timeout=timeout)
+            except simple_queue.Empty:
+                return
+            while True:
+                book_id = active_futures.pop(future, None)
+                if book_id is not None:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error_trace(f"Future exception for {book_id}: {e}")
+                try:
+                    future = completed_q.get_nowait()
+                except simple_queue.Empty:
+                    return
 
         while True:
             if stop_event and stop_event.is_set():
                 logger.info("Shutdown signal received for download coordinator")
                 # Wait for any in-flight downloads to finish gracefully
-                if active_futures:
-                    done, _ = wait(
-                        active_futures.keys(),
-                        return_when=ALL_COMPLETED,
-                    )
-                    for future in done:
-                        book_id = active_futures.pop(future, None)
-                        if book_id is None:
-                            continue
-                        try:
-                            future.result()
-                        except Exception as e:
-                            logger.error_trace(
-                                f"Future exception during shutdown for {book_id}: {e}"
-                            )
+                while active_futures:
+                    _drain_completed(block=True)
                 break
 
-            # Start new downloads if we have capacity
+            # Start new downloads if we have capacity. With no work in
+            # flight this blocks on the queue's own condition until a job
+            # arrives (or the stop event is set) instead of polling.
             started_download = False
             while len(active_futures) < MAX_CONCURRENT_DOWNLOADS:
                 block_for_job = not active_futures
-                timeout = 0.1 if stop_event and block_for_job else None
-                next_download = book_queue.get_next(block=block_for_job, timeout=timeout)
+                next_download = book_queue.get_next(
+                    block=block_for_job, stop_event=stop_event
+                )
                 if not next_download:
                     break
 
@@ -632,6 +1026,7 @@ def concurrent_download_loop(stop_event: Optional[Event] = None) -> None:
 
                 future = executor.submit(_process_single_download, book_id, cancel_flag)
                 active_futures[future] = book_id
+                future.add_done_callback(completed_q.put)
                 started_download = True
 
             if started_download:
@@ -639,30 +1034,13 @@ def concurrent_download_loop(stop_event: Optional[Event] = None) -> None:
                 continue
 
             if not active_futures:
-                # No active work—wait for new jobs to arrive
-                wait_timeout = 0.1 if stop_event else None
-                book_queue.wait_for_item(timeout=wait_timeout)
-                continue
-
-            wait_timeout = 0.1 if stop_event else None
-            done, _ = wait(
-                active_futures.keys(),
-                timeout=wait_timeout,
-                return_when=FIRST_COMPLETED,
-            )
-
-            if not done:
-                # Timed out waiting (likely because we're checking for shutdown)
+                # Blocking get_next returned without a job: either shutdown
+                # was requested or the wait was interrupted; re-check at the top
                 continue
 
-            for future in done:
-                book_id = active_futures.pop(future, None)
-                if book_id is None:
-                    continue
-                try:
-                    future.result()
-                except Exception as e:
-                    logger.error_trace(f"Future exception for {book_id}: {e}")
+            # All slots busy or queue empty: block until a download finishes
+            # (with a coarse timeout only to re-check for shutdown).
+            _drain_completed(block=True, timeout=0.5 if stop_event else None)
 
 def _is_truthy(value: str) -> bool:
     return value.lower() in {"1", "true", "yes", "on"}
@@ -1,6 +1,9 @@
-"""Network operations manager for the book downloader application."""
+"""HTTP page fetching and file downloading for the book downloader application."""
 
+import functools
 import os
+import random
+import shutil
 from pathlib import Path
 from typing import BinaryIO, Callable, Optional, Tuple, Union
 
@@ -10,7 +13,8 @@ import requests
 import time
 from datetime import datetime, timezone
 from email.utils import parsedate_to_datetime
-from threading import Event
+from threading import Event, Lock
+from typing import Dict
 from urllib.parse import urlparse
 
 from logger import setup_logger
@@ -20,34 +24,105 @@ from env import (
     DEFAULT_SLEEP,
     RATE_LIMIT_MAX_SLEEP,
     USE_CF_BYPASS,
+    USE_HEAD_PRECHECK,
     USING_EXTERNAL_BYPASSER,
 )
-if USE_CF_BYPASS:
+logger = setup_logger(__name__)
+
+
+@functools.lru_cache(maxsize=1)
+def _bypasser() -> Callable[[str], Optional[str]]:
+    """Import the Cloudflare bypasser on first use.
+
+    The internal bypasser pulls in Selenium and a Chrome driver; deferring
+    the import keeps process start cheap for workers that never need it.
+    """
+
     if USING_EXTERNAL_BYPASSER:
         from cloudflare_bypasser_external import get_bypassed_page
     else:
         from cloudflare_bypasser import get_bypassed_page
-
-logger = setup_logger(__name__)
-
-RATE_LIMIT_STATUS_CODES = {429, 503}
+    return get_bypassed_page
+
+# Shared session so urllib3 reuses keep-alive connections to the same host
+# instead of paying a fresh TCP+TLS handshake per request.
+_SESSION = requests.Session()
+# Resolve the per-scheme proxy selection once; passing proxies= per call
+# makes requests re-merge environment overlays on every request.
+_RESOLVED_PROXIES = {scheme: proxy for scheme, proxy in (PROXIES or {}).items() if proxy}
+_SESSION.proxies.update(_RESOLVED_PROXIES)
+_adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=32)
+_SESSION.mount("http://", _adapter)
+_SESSION.mount("https://", _adapter)
+
+RATE_LIMIT_STATUS_CODES = (429, 503)
+# Sleep before hitting a host again only when its last response signalled a
+# nearly exhausted rate-limit window, instead of a fixed delay per request.
+RATE_LIMIT_REMAINING_FLOOR = 1
 DOWNLOAD_CHUNK_SIZE = 64 * 1024
 PROGRESS_MIN_INCREMENT = 1.0
 PROGRESS_MIN_INTERVAL = 0.25
+# (connect, read) timeouts; a hung mirror must not pin a worker thread forever.
+HTML_TIMEOUT = (5, 30)
+DOWNLOAD_TIMEOUT = (5, 120)
+# Mid-stream failures are resumed with Range requests at most this many times.
+DOWNLOAD_MAX_RESUME = 3
 
+# Backoff schedules are precomputed at import, and every wait gets a
+# proportional jitter so concurrent workers don't retry in lockstep.
+_BACKOFF_JITTER = 0.25
+_BACKOFF_TABLE = tuple(min(DEFAULT_SLEEP * (2 ** i), RATE_LIMIT_MAX_SLEEP) for i in range(16))
+_RETRY_TABLE = tuple(min(DEFAULT_SLEEP * (i + 1), RATE_LIMIT_MAX_SLEEP) for i in range(16))
+_backoff_rng = random.Random()
 
-def _parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
-    """Parse Retry-After header value into seconds."""
 
-    if not retry_after:
-        return None
+def _with_jitter(base: float) -> float:
+    return base + _backoff_rng.uniform(0.0, base * _BACKOFF_JITTER)
 
-    retry_after = retry_after.strip()
-    if not retry_after:
-        return None
 
-    if retry_after.isdigit():
-        return float(retry_after)
+_HOST_THROTTLE_LOCK = Lock()
+_host_next_allowed: Dict[str, float] = {}
+
+
+def _throttle_host(url: str) -> str:
+    """Sleep until the host's next-allowed timestamp, returning the host key."""
+
+    host = urlparse(url).netloc
+    with _HOST_THROTTLE_LOCK:
+        next_allowed = _host_next_allowed.get(host, 0.0)
+    delay = next_allowed - time.monotonic()
+    if delay > 0:
+        logger.debug(f"Throttling requests to {host} for {delay:.2f}s")
+        time.sleep(delay)
+    return host
+
+
+def _note_rate_limit_headers(host: str, response: requests.Response) -> None:
+    """Record a cool-down for the host when its rate-limit window is nearly spent."""
+
+    remaining = response.headers.get("RateLimit-Remaining")
+    if remaining is None:
+        remaining = response.headers.get("X-RateLimit-Remaining")
+    if remaining is None:
+        return
+    try:
+        remaining_count = int(remaining)
+    except ValueError:
+        return
+    if remaining_count > RATE_LIMIT_REMAINING_FLOOR:
+        return
+    with _HOST_THROTTLE_LOCK:
+        _host_next_allowed[host] = time.monotonic() + DEFAULT_SLEEP
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_retry_after_datetime(retry_after: str) -> Optional[datetime]:
+    """Parse an HTTP-date Retry-After value, memoized per header string.
+
+    Servers under sustained rate limiting tend to repeat the same header
+    value, and the RFC-2822 parse is the expensive part, so it is cached;
+    the "seconds remaining" arithmetic stays outside the cache.
+    """
 
     try:
         retry_datetime = parsedate_to_datetime(retry_after)
@@ -60,22 +135,47 @@ def _parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
     if retry_datetime.tzinfo is None:
         retry_datetime = retry_datetime.replace(tzinfo=timezone.utc)
 
-    now = datetime.now(timezone.utc)
-    wait_seconds = (retry_datetime - now).total_seconds()
-    return max(wait_seconds, 0.0)
+    return retry_datetime
 
 
-def _rate_limit_wait_details(response: requests.Response, consecutive_attempts: int) -> Optional[Tuple[float, Optional[str]]]:
-    """Return wait time and header details when a rate limit status is detected."""
+def _parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
+    """Parse Retry-After header value into seconds."""
 
-    if response.status_code not in RATE_LIMIT_STATUS_CODES:
+    if not retry_after:
         return None
 
+    retry_after = retry_after.strip()
+    if not retry_after:
+        return None
+
+    if retry_after[0].isdigit() and retry_after.isdigit():
+        return float(retry_after)
+
+    retry_datetime = _parse_retry_after_datetime(retry_after)
+    if retry_datetime is None:
+        return None
+
+    wait_seconds = (retry_datetime - datetime.now(timezone.utc)).total_seconds()
+    return max(wait_seconds, 0.0)
+
+
+def _is_rate_limited(status_code: int) -> bool:
+    """Cheap check run on every response; membership in a small tuple is
+    the same two scalar compares, and it stays in sync with the constant."""
+
+    return status_code in RATE_LIMIT_STATUS_CODES
+
+
+def _rate_limit_wait(response: requests.Response, consecutive_attempts: int) -> Tuple[float, Optional[str]]:
+    """Return wait time and header details for a rate-limited response."""
+
     header_value = response.headers.get("Retry-After")
     wait_seconds = _parse_retry_after(header_value) if header_value is not None else None
 
     if wait_seconds is None:
-        wait_seconds = DEFAULT_SLEEP * (2 ** consecutive_attempts)
+        wait_seconds = _with_jitter(
+            _BACKOFF_TABLE[min(consecutive_attempts, len(_BACKOFF_TABLE) - 1)]
+        )
 
     wait_seconds = max(0.0, min(wait_seconds, RATE_LIMIT_MAX_SLEEP))
     return wait_seconds, header_value
@@ -97,16 +197,16 @@ def html_get_page(url: str, retry: int = MAX_RETRY, use_bypasser: bool = False)
 
             if current_use_bypasser and USE_CF_BYPASS:
                 logger.info(f"GET Using Cloudflare Bypasser for: {url}")
-                page = get_bypassed_page(url)
+                page = _bypasser()(url)
                 logger.debug(f"Success getting: {url}")
-                return str(page)
+                return page or ""
 
             logger.info(f"GET: {url}")
-            response = requests.get(url, proxies=PROXIES)
+            host = _throttle_host(url)
+            response = _SESSION.get(url, timeout=HTML_TIMEOUT)
 
-            wait_details = _rate_limit_wait_details(response, rate_limit_attempts)
-            if wait_details is not None:
-                wait_seconds, header_value = wait_details
+            if _is_rate_limited(response.status_code):
+                wait_seconds, header_value = _rate_limit_wait(response, rate_limit_attempts)
                 logger.warning(
                     f"Rate limit detected for URL {url} (status {response.status_code}); "
                     f"waiting {wait_seconds:.2f}s before retrying (Retry-After: {header_value or 'not provided'})"
@@ -120,8 +220,12 @@ def html_get_page(url: str, retry: int = MAX_RETRY, use_bypasser: bool = False)
 
             rate_limit_attempts = 0
             response.raise_for_status()
+            _note_rate_limit_headers(host, response)
             logger.debug(f"Success getting: {url}")
-            return str(response.text)
+            # Decode explicitly: response.text falls back to charset
+            # detection over the whole body when the header lacks a charset.
+            encoding = response.encoding or "utf-8"
+            return response.content.decode(encoding, errors="replace")
 
         except Exception as e:
             if retries_remaining == 0:
@@ -144,9 +248,11 @@ def html_get_page(url: str, retry: int = MAX_RETRY, use_bypasser: bool = False)
                 retries_remaining -= 1
                 continue
 
-            sleep_time = DEFAULT_SLEEP * (MAX_RETRY - retries_remaining + 1)
+            sleep_time = _with_jitter(
+                _RETRY_TABLE[min(MAX_RETRY - retries_remaining, len(_RETRY_TABLE) - 1)]
+            )
             logger.warning(
-                f"Retrying GET {url} in {sleep_time} seconds due to error: {e}"
+                f"Retrying GET {url} in {sleep_time:.2f} seconds due to error: {e}"
             )
             time.sleep(sleep_time)
             retries_remaining -= 1
@@ -158,6 +264,7 @@ def html_get_page(url: str, retry: int = MAX_RETRY, use_bypasser: bool = False)
 
     return ""
 
+
 def _parse_size_to_bytes(size: str) -> Optional[int]:
     """Parse size strings like "1.2 mb" into a byte count."""
 
@@ -195,14 +302,49 @@ def _open_destination(
 
     if isinstance(destination, (str, os.PathLike)):
         path = Path(destination)
-        if path.parent and not path.parent.exists():
-            path.parent.mkdir(parents=True, exist_ok=True)
-        handle = path.open("wb")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unbuffered: the download loop already hands over 64 KiB chunks, so
+        # BufferedWriter would only add an extra memcpy per chunk.
+        handle = path.open("wb", buffering=0)
         return handle, path, True
 
     raise TypeError("destination must be a path or binary file-like object")
 
 
+def _head_precheck(link: str, rate_limit_attempts: int) -> Optional[str]:
+    """Probe a download link with HEAD before committing to a streaming GET.
+
+    Returns "rate_limited" after sleeping out the advertised wait,
+    "html" when the mirror is serving an anti-bot HTML page instead of the
+    file, and None when the download should proceed (including on any HEAD
+    failure, since some mirrors don't support it).
+    """
+
+    try:
+        head = _SESSION.head(link, allow_redirects=True, timeout=HTML_TIMEOUT)
+    except requests.exceptions.RequestException as exc:
+        logger.debug(f"HEAD pre-check failed for {link}: {exc}")
+        return None
+
+    try:
+        if _is_rate_limited(head.status_code):
+            wait_seconds, header_value = _rate_limit_wait(head, rate_limit_attempts)
+            logger.warning(
+                f"Rate limit detected by HEAD pre-check for {link} (status {head.status_code}); "
+                f"waiting {wait_seconds:.2f}s before retrying (Retry-After: {header_value or 'not provided'})"
+            )
+            if wait_seconds > 0:
+                time.sleep(wait_seconds)
+            return "rate_limited"
+
+        if head.status_code == 200 and head.headers.get("content-type", "").startswith("text/html"):
+            return "html"
+    finally:
+        head.close()
+
+    return None
+
+
 def download_url(
     link: str,
     destination: Union[str, os.PathLike[str], BinaryIO],
@@ -240,14 +382,24 @@ def download_url(
         logger.info(f"Downloading from: {link}")
 
         while True:
-            response = requests.get(link, stream=True, proxies=PROXIES)
-
-            wait_details = _rate_limit_wait_details(response, rate_limit_attempts)
-            if wait_details is None:
+            if USE_HEAD_PRECHECK:
+                precheck = _head_precheck(link, rate_limit_attempts)
+                if precheck == "rate_limited":
+                    rate_limit_attempts += 1
+                    continue
+                if precheck == "html":
+                    logger.warning(
+                        f"HEAD pre-check for {link} reported HTML content; aborting download"
+                    )
+                    return False
+
+            response = _SESSION.get(link, stream=True, timeout=DOWNLOAD_TIMEOUT)
+
+            if not _is_rate_limited(response.status_code):
                 rate_limit_attempts = 0
                 break
 
-            wait_seconds, header_value = wait_details
+            wait_seconds, header_value = _rate_limit_wait(response, rate_limit_attempts)
             logger.warning(
                 f"Rate limit detected for download {link} (status {response.status_code}); "
                 f"waiting {wait_seconds:.2f}s before retrying (Retry-After: {header_value or 'not provided'})"
@@ -273,11 +425,15 @@ def download_url(
                     total_size = None
 
         bytes_downloaded = 0
+        reported_completion = False
+        cancelled = False
+
+        fast_path = progress_callback is None and cancel_flag is None
+        start_pos = file_handle.tell() if fast_path else 0
+
         last_report_percent = -1.0
         last_report_time = time.monotonic()
 
-        reported_completion = False
-
         if progress_callback is not None:
             try:
                 progress_callback(0.0)
@@ -286,39 +442,84 @@ def download_url(
             if total_size:
                 last_report_percent = 0.0
 
-        cancelled = False
-
-        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
-            if cancel_flag is not None and cancel_flag.is_set():
-                cancelled = True
-                break
+        # The loop can run tens of thousands of iterations per download;
+        # bind everything it touches to locals up front.
+        _write = file_handle.write
+        _is_cancelled = cancel_flag.is_set if cancel_flag is not None else None
+        _monotonic = time.monotonic
+        min_increment = PROGRESS_MIN_INCREMENT
+        min_interval = PROGRESS_MIN_INTERVAL
+        report_progress = progress_callback is not None and bool(total_size)
 
-            if not chunk:
-                continue
-
-            file_handle.write(chunk)
-            bytes_downloaded += len(chunk)
+        resume_supported = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+        resume_attempts = 0
 
-            if cancel_flag is not None and cancel_flag.is_set():
-                cancelled = True
+        while True:
+            try:
+                if fast_path:
+                    # Nobody observes progress or cancellation, so the byte
+                    # copy can run entirely in C instead of dispatching per
+                    # chunk in Python.
+                    response.raw.decode_content = True
+                    shutil.copyfileobj(response.raw, file_handle, length=DOWNLOAD_CHUNK_SIZE)
+                    bytes_downloaded = file_handle.tell() - start_pos
+                else:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if _is_cancelled is not None and _is_cancelled():
+                            cancelled = True
+                            break
+
+                        if not chunk:
+                            continue
+
+                        _write(chunk)
+                        bytes_downloaded += len(chunk)
+
+                        if report_progress:
+                            percent = min(bytes_downloaded / total_size * 100.0, 100.0)
+                            now = _monotonic()
+                            if (
+                                percent >= 100.0
+                                or percent - last_report_percent >= min_increment
+                                or now - last_report_time >= min_interval
+                            ):
+                                try:
+                                    progress_callback(percent)
+                                except Exception:
+                                    logger.warning("Progress callback raised an exception", exc_info=True)
+                                last_report_percent = percent
+                                last_report_time = now
+                                if percent >= 100.0:
+                                    reported_completion = True
                 break
-
-            if progress_callback is not None and total_size:
-                percent = min(bytes_downloaded / total_size * 100.0, 100.0)
-                now = time.monotonic()
+            except (
+                requests.exceptions.ChunkedEncodingError,
+                requests.exceptions.ConnectionError,
+                requests.exceptions.ReadTimeout,
+            ) as stream_error:
+                if fast_path:
+                    bytes_downloaded = file_handle.tell() - start_pos
                 if (
-                    percent >= 100.0
-                    or percent - last_report_percent >= PROGRESS_MIN_INCREMENT
-                    or now - last_report_time >= PROGRESS_MIN_INTERVAL
+                    not resume_supported
+                    or bytes_downloaded <= 0
+                    or resume_attempts >= DOWNLOAD_MAX_RESUME
                 ):
-                    try:
-                        progress_callback(percent)
-                    except Exception:
-                        logger.warning("Progress callback raised an exception", exc_info=True)
-                    last_report_percent = percent
-                    last_report_time = now
-                    if percent >= 100.0:
-                        reported_completion = True
+                    raise
+                resume_attempts += 1
+                logger.warning(
+                    f"Download stream interrupted for {link} ({stream_error}); "
+                    f"resuming from byte {bytes_downloaded} "
+                    f"(attempt {resume_attempts}/{DOWNLOAD_MAX_RESUME})"
+                )
+                response.close()
+                response = _SESSION.get(
+                    link,
+                    stream=True,
+                    timeout=DOWNLOAD_TIMEOUT,
+                    headers={"Range": f"bytes={bytes_downloaded}-"},
+                )
+                if response.status_code != 206:
+                    raise stream_error
 
         if cancelled:
             logger.info(f"Download cancelled: {link}")
@@ -365,21 +566,29 @@ def download_url(
                     exc_info=True,
                 )
 
+@functools.lru_cache(maxsize=8)
+def _parse_base(base_url: str):
+    """Parse a base URL once; scrapes reuse the same handful of bases."""
+
+    return urlparse(base_url)
+
+
 def get_absolute_url(base_url: str, url: str) -> str:
     """Get absolute URL from relative URL and base URL.
-    
+
     Args:
         base_url: Base URL
         url: Relative URL
     """
-    if url.strip() == "":
-        return ""
-    if url.strip("#") == "":
+    stripped = url.strip()
+    if not stripped or stripped.strip("#") == "":
         return ""
-    if url.startswith("http"):
-        return url
-    parsed_url = urlparse(url)
-    parsed_base = urlparse(base_url)
+    if stripped.startswith("http"):
+        return stripped
+    if stripped.startswith("//"):
+        return f"{_parse_base(base_url).scheme}:{stripped}"
+    parsed_url = urlparse(stripped)
     if parsed_url.netloc == "" or parsed_url.scheme == "":
+        parsed_base = _parse_base(base_url)
         parsed_url = parsed_url._replace(netloc=parsed_base.netloc, scheme=parsed_base.scheme)
     return parsed_url.geturl()
@@ -12,10 +12,15 @@ TMP_DIR = Path(os.getenv("TMP_DIR", "/tmp/cwa-book-downloader"))
 INGEST_DIR = Path(os.getenv("INGEST_DIR", "/cwa-book-ingest"))
 STATUS_TIMEOUT = int(os.getenv("STATUS_TIMEOUT", "3600"))
 USE_BOOK_TITLE = string_to_bool(os.getenv("USE_BOOK_TITLE", "false"))
+# "md5" (default, keeps existing filenames stable) or "xxh3" (faster, needs xxhash)
+FILENAME_HASH_ALGO = os.getenv("FILENAME_HASH_ALGO", "md5").strip().lower()
 MAX_RETRY = int(os.getenv("MAX_RETRY", "10"))
 DEFAULT_SLEEP = int(os.getenv("DEFAULT_SLEEP", "5"))
 RATE_LIMIT_MAX_SLEEP = int(os.getenv("RATE_LIMIT_MAX_SLEEP", "300"))
 USE_CF_BYPASS = string_to_bool(os.getenv("USE_CF_BYPASS", "true"))
+# Probe download links with a HEAD request before streaming; off by default
+# because some mirrors reject or mishandle HEAD.
+USE_HEAD_PRECHECK = string_to_bool(os.getenv("USE_HEAD_PRECHECK", "false"))
 HTTP_PROXY = os.getenv("HTTP_PROXY", "").strip()
 HTTPS_PROXY = os.getenv("HTTPS_PROXY", "").strip()
 AA_DONATOR_KEY = os.getenv("AA_DONATOR_KEY", "").strip()
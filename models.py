@@ -32,7 +32,7 @@ class QueueItem:
             return self.priority < other.priority
         return self.added_time < other.added_time
 
-@dataclass
+@dataclass(slots=True)
 class BookInfo:
     """Data class representing book information."""
     id: str
@@ -79,6 +79,11 @@ class DuplicateEntry:
 
 class BookQueue:
     """Thread-safe book queue manager with priority support and cancellation."""
+
+    # How often a blocking get_next re-checks its stop_event. Job arrival
+    # still wakes the underlying queue condition immediately.
+    _STOP_CHECK_INTERVAL = 0.5
+
     def __init__(self) -> None:
         self._queue: queue.PriorityQueue[QueueItem] = queue.PriorityQueue()
         self._lock = Lock()
@@ -89,6 +94,8 @@ class BookQueue:
         self._cancel_flags: dict[str, Event] = {}  # Cancellation flags for active downloads
         self._active_downloads: dict[str, bool] = {}  # Track currently downloading books
         self._queue_not_empty = Event()
+        self._drained = Event()  # Set whenever no download is active
+        self._drained.set()
         self._duplicates: dict[str, DuplicateEntry] = {}
     
     def add(self, book_id: str, book_data: BookInfo, priority: int = 0) -> None:
@@ -111,21 +118,42 @@ class BookQueue:
             self._update_status(book_id, QueueStatus.QUEUED)
             self._queue_not_empty.set()
 
-    def get_next(self, block: bool = False, timeout: Optional[float] = None) -> Optional[Tuple[str, Event]]:
+    def get_next(
+        self,
+        block: bool = False,
+        timeout: Optional[float] = None,
+        stop_event: Optional[Event] = None,
+    ) -> Optional[Tuple[str, Event]]:
         """Get next book ID from queue with cancellation flag.
 
+        Args:
+            block: Wait for an item instead of returning immediately
+            timeout: Maximum time to wait when blocking
+            stop_event: Optional event that aborts a blocking wait when set
+
         Returns:
             Tuple of (book_id, cancel_flag) or None if queue is empty
         """
         deadline = None if timeout is None else time.monotonic() + timeout
 
         while True:
+            if stop_event is not None and stop_event.is_set():
+                return None
             try:
                 wait_timeout = None
                 if deadline is not None:
                     wait_timeout = max(0, deadline - time.monotonic())
+                if block and stop_event is not None:
+                    if wait_timeout is None or wait_timeout > self._STOP_CHECK_INTERVAL:
+                        wait_timeout = self._STOP_CHECK_INTERVAL
                 queue_item = self._queue.get(block=block, timeout=wait_timeout)
             except queue.Empty:
+                if (
+                    block
+                    and stop_event is not None
+                    and (deadline is None or time.monotonic() < deadline)
+                ):
+                    continue
                 return None
 
             book_id = queue_item.book_id
@@ -150,6 +178,7 @@ class BookQueue:
                 cancel_flag = Event()
                 self._cancel_flags[book_id] = cancel_flag
                 self._active_downloads[book_id] = True
+                self._drained.clear()
                 if self._queue.empty():
                     self._queue_not_empty.clear()
 
@@ -169,6 +198,8 @@ class BookQueue:
             if status in [QueueStatus.AVAILABLE, QueueStatus.ERROR, QueueStatus.DONE, QueueStatus.CANCELLED]:
                 self._active_downloads.pop(book_id, None)
                 self._cancel_flags.pop(book_id, None)
+                if not self._active_downloads:
+                    self._drained.set()
     
     def update_download_path(self, book_id: str, download_path: str) -> None:
         """Update the download path of a book in the queue."""
@@ -337,6 +368,10 @@ class BookQueue:
     def wait_for_item(self, timeout: Optional[float] = None) -> bool:
         """Block until at least one queued item is available."""
         return self._queue_not_empty.wait(timeout)
+
+    def wait_drained(self, timeout: Optional[float] = None) -> bool:
+        """Block until no downloads are active."""
+        return self._drained.wait(timeout)
             
     def clear_completed(self) -> int:
         """Remove all completed, errored, or cancelled books from tracking.
@@ -380,6 +415,9 @@ class BookQueue:
                 self._cancel_flags.pop(book_id, None)
                 self._active_downloads.pop(book_id, None)
 
+            if not self._active_downloads:
+                self._drained.set()
+
             return removed_count
         
     def refresh(self) -> None:
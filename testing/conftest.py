@@ -13,3 +13,42 @@ os.environ.setdefault("HTTPS_PROXY", "")
 ROOT_DIR = Path(__file__).resolve().parent.parent
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
+
+import pytest
+
+# Imported here, after the environment is pinned, so every test module hits
+# the cached sys.modules entry instead of re-triggering import side effects.
+import downloader
+import app as flask_app_module
+import backend as backend_module
+import models
+
+# app.py binds the same backend module object, so fixtures only need to patch
+# the canonical module; this guards against a refactor that breaks aliasing.
+assert flask_app_module.backend is backend_module
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The Flask application, configured once for the whole test session."""
+
+    flask_app_module.app.config.update(TESTING=True)
+    return flask_app_module.app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    """A shared test client; per-test state lives in function-scoped fixtures."""
+
+    with app.test_client() as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def isolated_queue(monkeypatch):
+    """A fresh BookQueue patched over the shared global instance."""
+
+    queue = models.BookQueue()
+    for module in (models, backend_module):
+        monkeypatch.setattr(module, "book_queue", queue)
+    return queue
@@ -3,27 +3,13 @@ import time
 import shutil
 from pathlib import Path
 
-import pytest
-
 import backend
 import models
 from models import BookInfo, QueueStatus
 
 
-@pytest.fixture
-def isolated_queue(monkeypatch):
-    queue = models.BookQueue()
-    monkeypatch.setattr(models, "book_queue", queue)
-    monkeypatch.setattr(backend, "book_queue", queue)
-    return queue
-
-
 def _wait_for_drained(queue: models.BookQueue) -> None:
-    for _ in range(200):
-        if not queue.get_active_downloads():
-            return
-        time.sleep(0.01)
-    raise AssertionError("active downloads did not drain in time")
+    assert queue.wait_drained(2.0), "active downloads did not drain in time"
 
 
 def test_concurrent_download_loop_schedules_next_job(monkeypatch, isolated_queue):
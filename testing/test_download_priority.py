@@ -2,17 +2,9 @@
 
 import pytest
 
-import app as flask_app_module
 import backend
 
 
-@pytest.fixture
-def client():
-    """Return a Flask test client for the application."""
-
-    return flask_app_module.app.test_client()
-
-
 @pytest.fixture
 def queue_stub(monkeypatch):
     """Stub out backend.queue_book and capture calls."""
@@ -23,52 +15,43 @@ def queue_stub(monkeypatch):
         calls.append((book_id, priority, force))
         return True, None
 
+    # conftest.py asserts flask_app_module.backend aliases this module, so
+    # patching it once covers the app's view as well.
     monkeypatch.setattr(backend, "queue_book", fake_queue)
-    monkeypatch.setattr(flask_app_module.backend, "queue_book", fake_queue)
     return calls
 
 
-def test_api_download_rejects_empty_priority(client, queue_stub):
-    """An empty priority value should be rejected with a 400 response."""
-
-    response = client.get("/api/download", query_string={"id": "book-empty", "priority": ""})
-
-    assert response.status_code == 400
-    assert response.get_json() == {"error": "Invalid priority value: must be an integer."}
-    assert queue_stub == []
-
-
-def test_api_download_rejects_alpha_priority(client, queue_stub):
-    """Non-numeric priority values should be rejected."""
-
-    response = client.get("/api/download", query_string={"id": "book-alpha", "priority": "high"})
-
-    assert response.status_code == 400
-    assert response.get_json() == {"error": "Invalid priority value: must be an integer."}
-    assert queue_stub == []
-
-
-def test_api_download_allows_missing_priority(client, queue_stub):
-    """Omitting the priority parameter should queue the book at default priority."""
-
-    response = client.get("/api/download", query_string={"id": "book-default"})
-
-    assert response.status_code == 200
-    payload = response.get_json()
-    assert payload["status"] == "queued"
-    assert payload["priority"] == 0
-    assert payload["forced"] is False
-    assert queue_stub == [("book-default", 0, False)]
-
-
-def test_api_download_accepts_valid_priority(client, queue_stub):
-    """Numeric priority values should be accepted and forwarded to the backend."""
-
-    response = client.get("/api/download", query_string={"id": "book-priority", "priority": "5"})
-
-    assert response.status_code == 200
+_INVALID_PRIORITY_ERROR = {"error": "Invalid priority value: must be an integer."}
+
+
+@pytest.mark.parametrize(
+    "priority_qs, expected_status, expected_payload, expected_calls",
+    [
+        pytest.param({"priority": ""}, 400, _INVALID_PRIORITY_ERROR, [], id="empty-priority"),
+        pytest.param({"priority": "high"}, 400, _INVALID_PRIORITY_ERROR, [], id="alpha-priority"),
+        pytest.param(
+            {},
+            200,
+            {"status": "queued", "priority": 0, "forced": False},
+            [("book-x", 0, False)],
+            id="missing-priority",
+        ),
+        pytest.param(
+            {"priority": "5"},
+            200,
+            {"status": "queued", "priority": 5, "forced": False},
+            [("book-x", 5, False)],
+            id="valid-priority",
+        ),
+    ],
+)
+def test_api_download_priority(client, queue_stub, priority_qs, expected_status, expected_payload, expected_calls):
+    """Priority values are validated and forwarded to the backend."""
+
+    response = client.get("/api/download", query_string={"id": "book-x", **priority_qs})
+
+    assert response.status_code == expected_status
     payload = response.get_json()
-    assert payload["status"] == "queued"
-    assert payload["priority"] == 5
-    assert payload["forced"] is False
-    assert queue_stub == [("book-priority", 5, False)]
+    for key, value in expected_payload.items():
+        assert payload[key] == value
+    assert queue_stub == expected_calls
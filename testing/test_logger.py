@@ -3,18 +3,11 @@ import logging
 from logger import CustomLogger
 
 
-def test_error_trace_respects_explicit_exc_info(monkeypatch):
+def test_error_trace_respects_explicit_exc_info(caplog, monkeypatch):
     """Calling error_trace with exc_info=True should not raise and reaches Logger.error."""
 
     logger = CustomLogger("test-logger")
 
-    calls = []
-
-    def fake_error(self, msg, *args, **kwargs):
-        calls.append((msg, args, kwargs))
-
-    monkeypatch.setattr(logging.Logger, "error", fake_error)
-
     log_resource_usage_calls = []
 
     def fake_log_resource_usage(self):
@@ -22,7 +15,21 @@ def test_error_trace_respects_explicit_exc_info(monkeypatch):
 
     monkeypatch.setattr(CustomLogger, "log_resource_usage", fake_log_resource_usage)
 
-    logger.error_trace("msg", exc_info=True)
+    # CustomLogger is instantiated directly rather than through getLogger, so
+    # it sits outside the logging hierarchy; attach caplog's handler to it.
+    logger.setLevel(logging.ERROR)
+    logger.addHandler(caplog.handler)
+    try:
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.error_trace("msg", exc_info=True)
+    finally:
+        logger.removeHandler(caplog.handler)
 
     assert log_resource_usage_calls, "log_resource_usage should be called before delegating"
-    assert calls == [("msg", (), {"exc_info": True})]
+    record = caplog.records[-1]
+    assert record.message == "msg"
+    assert record.levelno == logging.ERROR
+    assert record.exc_info is not None
+    assert record.exc_info[0] is ValueError
@@ -2,40 +2,29 @@
 
 import json
 
-import pytest
-
-import app as flask_app_module
 import backend
-import models
 from models import BookInfo, QueueStatus
 
-
-@pytest.fixture
-def isolated_queue(monkeypatch):
-    """Provide a fresh queue instance isolated from global state."""
-
-    queue = models.BookQueue()
-    monkeypatch.setattr(models, "book_queue", queue)
-    monkeypatch.setattr(backend, "book_queue", queue)
-    monkeypatch.setattr(flask_app_module.backend, "book_queue", queue)
-    return queue
+# Built once at import; every field the tests assert on is (re)set by the
+# queue inside each test, so sharing the instances across runs is safe.
+_AVAILABLE_INFO = BookInfo(id="book-available", title="With File", format="epub")
+_MISSING_INFO = BookInfo(id="book-missing", title="No File", format="pdf")
+_QUEUED_INFO = BookInfo(id="queued-book", title="Queued Book", format="mobi")
 
 
 def test_queue_status_returns_serializable_dict(isolated_queue, tmp_path):
     """queue_status should return only JSON-serializable primitives."""
 
-    available_book_id = "book-available"
-    available_info = BookInfo(id=available_book_id, title="With File", format="epub")
-    isolated_queue.add(available_book_id, available_info, priority=1)
+    available_book_id = _AVAILABLE_INFO.id
+    isolated_queue.add(available_book_id, _AVAILABLE_INFO, priority=1)
 
     download_path = tmp_path / "present.epub"
     download_path.write_text("content")
     isolated_queue.update_download_path(available_book_id, str(download_path))
     isolated_queue.update_status(available_book_id, QueueStatus.AVAILABLE)
 
-    missing_book_id = "book-missing"
-    missing_info = BookInfo(id=missing_book_id, title="No File", format="pdf")
-    isolated_queue.add(missing_book_id, missing_info, priority=2)
+    missing_book_id = _MISSING_INFO.id
+    isolated_queue.add(missing_book_id, _MISSING_INFO, priority=2)
     missing_path = tmp_path / "missing.epub"
     isolated_queue.update_download_path(missing_book_id, str(missing_path))
     isolated_queue.update_status(missing_book_id, QueueStatus.AVAILABLE)
@@ -58,17 +47,15 @@ def test_queue_status_returns_serializable_dict(isolated_queue, tmp_path):
     assert "download_path" not in missing_serialized
 
     # Should be JSON serializable without raising errors
-    json.dumps(result)
+    json.dumps(result, separators=(",", ":"), ensure_ascii=False)
 
 
-def test_api_status_endpoint_serializes_response(isolated_queue):
+def test_api_status_endpoint_serializes_response(client, isolated_queue):
     """The /api/status endpoint should serialize queue status correctly."""
 
-    book_id = "queued-book"
-    info = BookInfo(id=book_id, title="Queued Book", format="mobi")
-    isolated_queue.add(book_id, info, priority=0)
+    book_id = _QUEUED_INFO.id
+    isolated_queue.add(book_id, _QUEUED_INFO, priority=0)
 
-    client = flask_app_module.app.test_client()
     response = client.get("/api/status")
 
     assert response.status_code == 200
@@ -78,4 +65,4 @@ def test_api_status_endpoint_serializes_response(isolated_queue):
     assert queued_books[book_id]["title"] == "Queued Book"
 
     # Confirm the payload is fully JSON serializable
-    json.dumps(payload)
+    json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
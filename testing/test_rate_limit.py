@@ -1,32 +1,46 @@
 import io
-import os
 from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
 from threading import Event
 
 import pytest
 import requests
 
-
-# Ensure optional integrations are disabled during unit tests before importing the
-# application modules. This prevents heavy dependencies (like the Cloudflare
-# bypasser) from being imported and avoids network calls triggered from module
-# import side effects.
-os.environ.setdefault("USE_CF_BYPASS", "false")
-os.environ.setdefault("AA_BASE_URL", "https://example.com")
-os.environ.setdefault("HTTP_PROXY", "")
-os.environ.setdefault("HTTPS_PROXY", "")
-
+# conftest.py pins the environment (bypasser off, stub AA_BASE_URL, no
+# proxies) before any application module is imported.
 import downloader
 
+# Large payloads are materialized once at import and shared read-only
+# across tests; generators slice them through a memoryview to avoid copies.
+_LARGE_BODY = b"A" * (70 * 1024)
+_CANCEL_BODY = b"B" * (128 * 1024)
+_RESUME_BODY = b"C" * (128 * 1024)
+
 
 class DummyResponse:
+    __slots__ = (
+        "status_code",
+        "headers",
+        "text",
+        "encoding",
+        "content",
+        "raw",
+        "_closed",
+        "_iter_content_factory",
+        "_static_chunks",
+        "iter_content_calls",
+    )
+
     def __init__(self, status_code, headers=None, text="", content=b"", iter_content_factory=None):
         self.status_code = status_code
         self.headers = headers or {}
         self.text = text
-        self._content = content or text.encode("utf-8")
+        self.encoding = "utf-8"
+        self.content = content or text.encode("utf-8")
+        self.raw = io.BytesIO(self.content)
         self._closed = False
         self._iter_content_factory = iter_content_factory
+        self._static_chunks = (self.content,) if self.content else (b"",)
         self.iter_content_calls = []
 
     def raise_for_status(self):
@@ -37,13 +51,8 @@ class DummyResponse:
         self.iter_content_calls.append(chunk_size)
         if self._iter_content_factory is not None:
             yield from self._iter_content_factory(chunk_size)
-            return
-
-        if not self._content:
-            yield b""
-            return
-
-        yield self._content
+        else:
+            yield from self._static_chunks
 
     def close(self):
         self._closed = True
@@ -52,60 +61,58 @@ class DummyResponse:
 @pytest.fixture
 def sleep_calls(monkeypatch):
     calls = []
+    append = calls.append
 
     def fake_sleep(seconds):
-        calls.append(seconds)
+        append(seconds)
 
     monkeypatch.setattr(downloader.time, "sleep", fake_sleep)
     return calls
 
 
-def test_html_get_page_respects_retry_after_seconds(monkeypatch, sleep_calls):
-    retry_after_seconds = 2
-    responses = [
-        DummyResponse(429, headers={"Retry-After": str(retry_after_seconds)}),
-        DummyResponse(200, text="ok"),
-    ]
+def _http_date(delay_seconds):
+    # format_datetime emits the GMT form the downloader parses without
+    # strftime's locale-table lookups for %a/%b.
+    future = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+    return format_datetime(future, usegmt=True)
 
-    def fake_get(url, **kwargs):
-        return responses.pop(0)
 
-    monkeypatch.setattr(downloader.requests, "get", fake_get)
+# Retry-After comes in two shapes: delta-seconds and an HTTP-date. The header
+# value is built lazily so the date cases stay relative to the test's own now.
+RETRY_AFTER_CASES = [
+    pytest.param(lambda: "2", 2.0, id="seconds"),
+    pytest.param(lambda: _http_date(5), 5.0, id="http-date"),
+]
 
-    result = downloader.html_get_page("http://example.com", retry=1)
 
-    assert result == "ok"
-    assert pytest.approx(retry_after_seconds) == sleep_calls[0]
-    assert len(sleep_calls) == 1
-
-
-def test_html_get_page_retry_after_http_date(monkeypatch, sleep_calls):
-    retry_delay = timedelta(seconds=5)
-    future = datetime.now(timezone.utc) + retry_delay
-    responses = [
-        DummyResponse(429, headers={"Retry-After": future.strftime("%a, %d %b %Y %H:%M:%S GMT")}),
-        DummyResponse(200, text="ok"),
-    ]
+@pytest.mark.parametrize("retry_after_factory, expected_sleep", RETRY_AFTER_CASES)
+def test_html_get_page_respects_retry_after(monkeypatch, sleep_calls, retry_after_factory, expected_sleep):
+    responses = iter(
+        [
+            DummyResponse(429, headers={"Retry-After": retry_after_factory()}),
+            DummyResponse(200, text="ok"),
+        ]
+    )
 
     def fake_get(url, **kwargs):
-        return responses.pop(0)
+        return next(responses)
 
-    monkeypatch.setattr(downloader.requests, "get", fake_get)
+    monkeypatch.setattr(downloader._SESSION, "get", fake_get)
 
-    result = downloader.html_get_page("http://example.com")
+    result = downloader.html_get_page("http://example.com", retry=1)
 
     assert result == "ok"
-    assert pytest.approx(retry_delay.total_seconds(), abs=1.0) == sleep_calls[0]
+    assert pytest.approx(expected_sleep, abs=1.0) == sleep_calls[0]
     assert len(sleep_calls) == 1
 
 
 def test_html_get_page_success_does_not_sleep(monkeypatch, sleep_calls):
-    responses = [DummyResponse(200, text="ok")]
+    response = DummyResponse(200, text="ok")
 
     def fake_get(url, **kwargs):
-        return responses.pop(0)
+        return response
 
-    monkeypatch.setattr(downloader.requests, "get", fake_get)
+    monkeypatch.setattr(downloader._SESSION, "get", fake_get)
 
     result = downloader.html_get_page("http://example.com")
 
@@ -113,61 +120,39 @@ def test_html_get_page_success_does_not_sleep(monkeypatch, sleep_calls):
     assert sleep_calls == []
 
 
-def test_download_url_respects_retry_after_seconds(monkeypatch, sleep_calls, tmp_path):
-    retry_after_seconds = 3
+@pytest.mark.parametrize("retry_after_factory, expected_sleep", RETRY_AFTER_CASES)
+def test_download_url_respects_retry_after(monkeypatch, sleep_calls, retry_after_factory, expected_sleep):
     body = b"payload"
-    responses = [
-        DummyResponse(429, headers={"Retry-After": str(retry_after_seconds)}),
-        DummyResponse(200, headers={"content-length": str(len(body))}, content=body),
-    ]
-
-    def fake_get(url, stream=False, **kwargs):
-        assert stream is True
-        return responses.pop(0)
-
-    monkeypatch.setattr(downloader.requests, "get", fake_get)
-
-    destination = tmp_path / "file.bin"
-    result = downloader.download_url("http://example.com/file", destination)
-
-    assert result is True
-    assert destination.read_bytes() == body
-    assert len(responses) == 0
-    assert len(sleep_calls) == 1
-    assert sleep_calls[0] == pytest.approx(retry_after_seconds)
-
-
-def test_download_url_retry_after_http_date(monkeypatch, sleep_calls, tmp_path):
-    retry_delay = timedelta(seconds=7)
-    future = datetime.now(timezone.utc) + retry_delay
-    body = b"content"
-    responses = [
-        DummyResponse(429, headers={"Retry-After": future.strftime("%a, %d %b %Y %H:%M:%S GMT")}),
-        DummyResponse(200, headers={"content-length": str(len(body))}, content=body),
-    ]
+    responses = iter(
+        [
+            DummyResponse(429, headers={"Retry-After": retry_after_factory()}),
+            DummyResponse(200, headers={"content-length": str(len(body))}, content=body),
+        ]
+    )
 
     def fake_get(url, stream=False, **kwargs):
         assert stream is True
-        return responses.pop(0)
+        return next(responses)
 
-    monkeypatch.setattr(downloader.requests, "get", fake_get)
+    monkeypatch.setattr(downloader._SESSION, "get", fake_get)
 
-    destination = tmp_path / "file.bin"
+    destination = io.BytesIO()
     result = downloader.download_url("http://example.com/file", destination)
 
     assert result is True
-    assert destination.read_bytes() == body
-    assert len(responses) == 0
+    assert destination.getvalue() == body
+    assert next(responses, None) is None
     assert len(sleep_calls) == 1
-    assert sleep_calls[0] == pytest.approx(retry_delay.total_seconds(), abs=1.0)
+    assert sleep_calls[0] == pytest.approx(expected_sleep, abs=1.0)
 
 
-def test_download_url_streams_large_chunks(monkeypatch, tmp_path):
-    body = b"A" * (70 * 1024)
+def test_download_url_streams_large_chunks(monkeypatch):
+    body = _LARGE_BODY
 
     def chunk_generator(chunk_size):
+        view = memoryview(body)
         for index in range(0, len(body), chunk_size):
-            yield body[index : index + chunk_size]
+            yield bytes(view[index : index + chunk_size])
 
     response = DummyResponse(
         200,
@@ -180,9 +165,9 @@ def test_download_url_streams_large_chunks(monkeypatch, tmp_path):
         assert stream is True
         return response
 
-    monkeypatch.setattr(downloader.requests, "get", fake_get)
+    monkeypatch.setattr(downloader._SESSION, "get", fake_get)
 
-    destination = tmp_path / "large.bin"
+    destination = io.BytesIO()
     progress_updates = []
 
     result = downloader.download_url(
@@ -192,7 +177,7 @@ def test_download_url_streams_large_chunks(monkeypatch, tmp_path):
     )
 
     assert result is True
-    assert destination.read_bytes() == body
+    assert destination.getvalue() == body
     assert response.iter_content_calls
     assert response.iter_content_calls[0] >= downloader.DOWNLOAD_CHUNK_SIZE
     assert progress_updates[0] == pytest.approx(0.0)
@@ -200,7 +185,7 @@ def test_download_url_streams_large_chunks(monkeypatch, tmp_path):
 
 
 def test_download_url_cancellation_cleans_up(monkeypatch, tmp_path):
-    body = b"B" * (128 * 1024)
+    body = _CANCEL_BODY
     cancel_flag = Event()
 
     def chunk_generator(chunk_size):
@@ -219,7 +204,7 @@ def test_download_url_cancellation_cleans_up(monkeypatch, tmp_path):
         assert stream is True
         return response
 
-    monkeypatch.setattr(downloader.requests, "get", fake_get)
+    monkeypatch.setattr(downloader._SESSION, "get", fake_get)
 
     destination = tmp_path / "cancel.bin"
     progress_updates = []
@@ -239,6 +224,47 @@ def test_download_url_cancellation_cleans_up(monkeypatch, tmp_path):
     assert all(update < 100.0 for update in progress_updates)
 
 
+def test_download_url_resumes_with_range_after_stream_error(monkeypatch, tmp_path):
+    body = _RESUME_BODY
+    split = 64 * 1024
+
+    def broken_stream(chunk_size):
+        yield body[:split]
+        raise requests.exceptions.ConnectionError("connection reset")
+
+    first = DummyResponse(
+        200,
+        headers={"content-length": str(len(body)), "Accept-Ranges": "bytes"},
+        content=body,
+        iter_content_factory=broken_stream,
+    )
+    resumed = DummyResponse(206, content=body[split:])
+    responses = iter([first, resumed])
+    range_headers = []
+
+    def fake_get(url, stream=False, headers=None, **kwargs):
+        assert stream is True
+        if headers is not None:
+            range_headers.append(headers.get("Range"))
+        return next(responses)
+
+    monkeypatch.setattr(downloader._SESSION, "get", fake_get)
+
+    destination = tmp_path / "resume.bin"
+    progress_updates = []
+
+    result = downloader.download_url(
+        "http://example.com/resume",
+        destination,
+        progress_callback=progress_updates.append,
+    )
+
+    assert result is True
+    assert destination.read_bytes() == body
+    assert range_headers == [f"bytes={split}-"]
+    assert progress_updates[-1] == pytest.approx(100.0)
+
+
 def test_download_url_writes_to_file_handle(monkeypatch):
     body = b"hello world"
     response = DummyResponse(
@@ -251,7 +277,7 @@ def test_download_url_writes_to_file_handle(monkeypatch):
         assert stream is True
         return response
 
-    monkeypatch.setattr(downloader.requests, "get", fake_get)
+    monkeypatch.setattr(downloader._SESSION, "get", fake_get)
 
     buffer = io.BytesIO()
 